@@ -6,11 +6,17 @@ from litellm import acompletion  # ✅ async version of completion
 import os
 import httpx
 from fastapi import HTTPException
-import json
+import orjson
 
 import boto3
+from botocore.config import Config
+from cachetools import TTLCache
+from botocore.exceptions import WaiterError
 import time
 import asyncio
+import threading
+import itertools
+from contextlib import asynccontextmanager, suppress
 
 from enterprise_models import models  # Import your enterprise models
 
@@ -22,7 +28,41 @@ logging.basicConfig(
 
 logger= logging.getLogger(__name__)
 
-app = FastAPI()
+# get ollama host
+OLLAMA_HOST= os.getenv("OLLAMA_HOST", "http://localhost:11434")
+
+logger.info(f"Using OLLAMA_HOST: {OLLAMA_HOST}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Validate AWS config, create a shared, pooled HTTP client for Ollama and clean up on shutdown."""
+    if os.getenv("OLLAMA_HOST", ""):  # Deployed on AWS: fail fast instead of part-way through a pull
+        missing = [name for name, value in {
+            "SUBNET_ID": SUBNET_ID,
+            "ALLOCATION_ID": ALLOCATION_ID,
+            "ROUTE_TABLE_ID": ROUTE_TABLE_ID,
+            "CLUSTER_NAME": CLUSTER_NAME,
+            "SERVICE_NAME": SERVICE_NAME,
+            "AUTOSCALING_GROUP_NAME": AUTOSCALING_GROUP_NAME,
+        }.items() if not value]
+        if missing:
+            raise RuntimeError(f"Missing environment variables: {', '.join(missing)}")
+
+    app.state.http_client = httpx.AsyncClient(
+        base_url=OLLAMA_HOST,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=httpx.Timeout(10.0)
+    )
+    yield
+    monitor = _nat_monitor_task
+    if monitor:
+        monitor.cancel()
+        with suppress(asyncio.CancelledError):
+            await monitor
+    await app.state.http_client.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS Middleware
 app.add_middleware(
@@ -33,35 +73,68 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# get ollama host
-OLLAMA_HOST= os.getenv("OLLAMA_HOST", "http://localhost:11434")
-
-logger.info(f"Using OLLAMA_HOST: {OLLAMA_HOST}")
-
-
 @app.get("/healthz")
-def health():
+async def health():
     logger.info("Health check endpoint called")
     return {"status": "ok"}
 
 
+# --- AWS Clients ---
+# boto3 clients are expensive to build but thread-safe once built, so share one per service.
+# They are created lazily so the app can still start where no AWS region is configured.
+_aws_clients = {}
+_aws_clients_lock = threading.Lock()
+
+# Adaptive retries add client-side rate limiting on throttling instead of legacy blind retries
+AWS_CLIENT_CONFIG = Config(
+    retries={'mode': 'adaptive', 'max_attempts': 5},
+    connect_timeout=3,
+    read_timeout=10,
+    tcp_keepalive=True
+)
+
+def aws_client(service_name: str):
+    """Return the shared boto3 client for a service, creating it on first use."""
+    client = _aws_clients.get(service_name)
+    if client is None:
+        with _aws_clients_lock:
+            client = _aws_clients.get(service_name)
+            if client is None:
+                client = boto3.client(service_name, config=AWS_CLIENT_CONFIG)
+                _aws_clients[service_name] = client
+    return client
+
+
 # --- AWS NAT Gateway Helpers ---
 SUBNET_ID = os.environ.get("SUBNET_ID")
 ALLOCATION_ID = os.environ.get("ALLOCATION_ID")
 ROUTE_TABLE_ID = os.environ.get("ROUTE_TABLE_ID")
 
-def get_ec2_client():
-    return boto3.client('ec2')
+# Short-lived cache for EC2 Describe results; cleared whenever we change the NAT Gateway or route.
+_nat_cache = TTLCache(maxsize=16, ttl=30)
+_nat_cache_lock = threading.Lock()
+
+def _invalidate_nat_cache():
+    with _nat_cache_lock:
+        _nat_cache.clear()
 
 def check_nat_gateway_status(ec2_client):
     """Check if a NAT Gateway is available in the subnet."""
+    cache_key = ("nat_gateway", SUBNET_ID)
+    with _nat_cache_lock:
+        if cache_key in _nat_cache:
+            return _nat_cache[cache_key]
+
     response = ec2_client.describe_nat_gateways(
         Filters=[
             {"Name": "subnet-id", "Values": [SUBNET_ID]},
             {"Name": "state", "Values": ["available"]}
         ]
     )
-    return response['NatGateways'][0]['NatGatewayId'] if response['NatGateways'] else None
+    nat_id = response['NatGateways'][0]['NatGatewayId'] if response['NatGateways'] else None
+    with _nat_cache_lock:
+        _nat_cache[cache_key] = nat_id
+    return nat_id
 
 def create_nat_gateway(ec2_client):
     """Create a NAT Gateway in the subnet."""
@@ -80,25 +153,22 @@ def create_nat_gateway(ec2_client):
             }]
         )
         nat_id = response['NatGateway']['NatGatewayId']
+        _invalidate_nat_cache()
         logger.info(f"Created NAT Gateway: {nat_id}")
         return nat_id
     except Exception as e:
         logger.error(f"Failed to create NAT Gateway: {e}")
         return None
 
-def is_nat_gateway_available(ec2_client, nat_gateway_id):
-    """Check if a specific NAT Gateway is available."""
-    try:
-        response = ec2_client.describe_nat_gateways(
-            Filters=[
-                {"Name": "nat-gateway-id", "Values": [nat_gateway_id]},
-                {"Name": "state", "Values": ["available"]}
-            ]
-        )
-        return bool(response['NatGateways'])
-    except Exception as e:
-        logger.error(f"Error checking NAT Gateway status: {e}")
-        return False
+def get_available_nat_gateway_ids(ec2_client, nat_gateway_ids):
+    """Return which of the given NAT Gateways are available."""
+    response = ec2_client.describe_nat_gateways(
+        Filters=[
+            {"Name": "nat-gateway-id", "Values": list(nat_gateway_ids)},
+            {"Name": "state", "Values": ["available"]}
+        ]
+    )
+    return {nat['NatGatewayId'] for nat in response['NatGateways']}
 
 def attach_nat_gateway_to_route_table(ec2_client, nat_gateway_id):
     """Attach the NAT Gateway to the route table."""
@@ -108,6 +178,7 @@ def attach_nat_gateway_to_route_table(ec2_client, nat_gateway_id):
             DestinationCidrBlock='0.0.0.0/0',
             NatGatewayId=nat_gateway_id
         )
+        _invalidate_nat_cache()
         logger.info(f"Attached NAT Gateway {nat_gateway_id} to Route Table {ROUTE_TABLE_ID}")
         return True
     except Exception as e:
@@ -118,6 +189,7 @@ def delete_nat_gateway(ec2_client, nat_gateway_id):
     """Delete the specified NAT Gateway."""
     try:
         ec2_client.delete_nat_gateway(NatGatewayId=nat_gateway_id)
+        _invalidate_nat_cache()
         logger.info(f"Deleted NAT Gateway: {nat_gateway_id}")
         return True
     except Exception as e:
@@ -126,19 +198,28 @@ def delete_nat_gateway(ec2_client, nat_gateway_id):
 
 def get_current_default_route(ec2_client):
     """Get the current default route for the route table."""
+    cache_key = ("default_route", ROUTE_TABLE_ID)
+    with _nat_cache_lock:
+        if cache_key in _nat_cache:
+            return _nat_cache[cache_key]
+
     try:
         response = ec2_client.describe_route_tables(RouteTableIds=[ROUTE_TABLE_ID])
         routes = response['RouteTables'][0]['Routes']
+        default_route = None
         for route in routes:
             if route.get('DestinationCidrBlock') == '0.0.0.0/0':
                 # Could be NatGatewayId, GatewayId (IGW), etc.
-                return {
+                default_route = {
                     "NatGatewayId": route.get("NatGatewayId"),
                     "GatewayId": route.get("GatewayId"),
                     "InstanceId": route.get("InstanceId"),
                     "NetworkInterfaceId": route.get("NetworkInterfaceId"),
                 }
-        return None
+                break
+        with _nat_cache_lock:
+            _nat_cache[cache_key] = default_route
+        return default_route
     except Exception as e:
         logger.error(f"Failed to get current default route: {e}")
         return None
@@ -157,6 +238,7 @@ def restore_default_route(ec2_client, original_route):
                 break  # Only one target should be set
 
         ec2_client.replace_route(**kwargs)
+        _invalidate_nat_cache()
         logger.info(f"Restored default route to original target: {original_route}")
         return True
     except Exception as e:
@@ -165,108 +247,195 @@ def restore_default_route(ec2_client, original_route):
 
 # --- Model Pull Task ---
 
+async def _run(fn, *args, **kwargs):
+    """Run a blocking boto3 helper in a worker thread so the event loop stays responsive."""
+    return await asyncio.to_thread(fn, *args, **kwargs)
+
+NAT_POLL_INTERVAL = 15
+NAT_READY_TIMEOUT = 600  # ~10 minutes
+# Pulls waiting for the NAT Gateway they created, keyed by gateway id. One shared monitor polls
+# for all of them and only runs while this is non-empty.
+_nat_waiters = {}
+_nat_monitor_task = None
+
+async def _nat_monitor():
+    """Shared poller for all waiting pulls: signal each pull once its own NAT Gateway is available."""
+    while _nat_waiters:
+        try:
+            available = await _run(get_available_nat_gateway_ids, aws_client("ec2"), list(_nat_waiters))
+            for nat_gateway_id in available:
+                if nat_gateway_id in _nat_waiters:
+                    _nat_waiters[nat_gateway_id].set()
+        except Exception as e:
+            logger.error("NAT Gateway monitor failed to check status: %s", e)
+        await asyncio.sleep(NAT_POLL_INTERVAL)
+
+def _on_nat_monitor_exit(task):
+    global _nat_monitor_task
+    if _nat_monitor_task is task:
+        _nat_monitor_task = None  # Let the next waiter start a fresh monitor
+    if not task.cancelled() and task.exception():
+        logger.error("NAT Gateway monitor stopped unexpectedly", exc_info=task.exception())
+
+async def _wait_for_nat_ready(nat_gateway_id: str):
+    """Wait for a specific NAT Gateway to become available, starting the shared monitor if needed."""
+    global _nat_monitor_task
+    ready = _nat_waiters[nat_gateway_id] = asyncio.Event()
+    if _nat_monitor_task is None:
+        _nat_monitor_task = asyncio.create_task(_nat_monitor())
+        _nat_monitor_task.add_done_callback(_on_nat_monitor_exit)
+    try:
+        await asyncio.wait_for(ready.wait(), timeout=NAT_READY_TIMEOUT)
+    finally:
+        del _nat_waiters[nat_gateway_id]
+        if not _nat_waiters and _nat_monitor_task:
+            # Detach before cancelling so a pull arriving meanwhile starts a new monitor
+            monitor, _nat_monitor_task = _nat_monitor_task, None
+            monitor.cancel()
+
 async def pull_model_task(model_name: str):
+    """Pull a model into Ollama, opening a NAT Gateway for the download when running on AWS.
+
+    Scheduled directly by BackgroundTasks so it runs on the server's event loop and can reuse app.state.http_client.
+    """
     if os.getenv("OLLAMA_HOST",""): # If OLLAMA_HOST is set, we assume Ollama is running on the host
-        ec2_client = get_ec2_client()
-        nat_gateway_id = check_nat_gateway_status(ec2_client)
-        original_route = get_current_default_route(ec2_client)  # <-- Save original route
+        ec2_client = aws_client("ec2")
+        nat_gateway_id = await _run(check_nat_gateway_status, ec2_client)
+        original_route = await _run(get_current_default_route, ec2_client)  # <-- Save original route
 
         if nat_gateway_id:
-            logger.info(f"NAT Gateway already available: {nat_gateway_id}")
+            logger.info("NAT Gateway already available: %s", nat_gateway_id)
         else:
-            nat_gateway_id = create_nat_gateway(ec2_client)
+            nat_gateway_id = await _run(create_nat_gateway, ec2_client)
             if not nat_gateway_id:
                 logger.error("Failed to create NAT Gateway, aborting model pull.")
                 return
 
             logger.info("Waiting for NAT Gateway to become available...")
-            for _ in range(40):  # up to ~10 minutes
-                if is_nat_gateway_available(ec2_client, nat_gateway_id):
-                    logger.info("NAT Gateway is now available.")
-                    break
-                time.sleep(15)
-            else:
-                logger.error("NAT Gateway did not become available in time.")
+            try:
+                await _wait_for_nat_ready(nat_gateway_id)
+                logger.info("NAT Gateway is now available.")
+            except asyncio.TimeoutError:
+                logger.error("NAT Gateway did not become available in time, deleting it.")
+                await _run(delete_nat_gateway, ec2_client, nat_gateway_id)
                 return
 
-        attach_nat_gateway_to_route_table(ec2_client, nat_gateway_id)
-        time.sleep(20)  # Ensure route is updated
-
-    # Pull model from Ollama
-    async with httpx.AsyncClient(timeout=None) as client:
-        for attempt in range(10):
-            try:
-                logger.info(f"Pulling model attempt {attempt+1} for {model_name}")
-                resp = await client.post(f"{OLLAMA_HOST}/api/pull", json={"name": model_name})
-                logger.info(f"Pull model response status: {resp.status_code}, body: {resp.text}")
-            except Exception as e:
-                logger.error(f"Exception during model pull: {e}")
+        await _run(attach_nat_gateway_to_route_table, ec2_client, nat_gateway_id)
+        await asyncio.sleep(20)  # Ensure route is updated
 
-            await asyncio.sleep(60)
-            try:
-                resp_tags = await client.get(f"{OLLAMA_HOST}/api/tags")
-                if resp_tags.status_code == 200:
-                    models = resp_tags.json().get("models", [])
-                    if any(m.get("name") == model_name for m in models):
-                        logger.info(f"Model {model_name} is now available locally.")
-                        break
-            except Exception as e:
-                logger.error(f"Exception during model tag check: {e}")
-        else:
-            logger.warning(f"Model {model_name} was not available after 10 attempts.")
+    # Pull model from Ollama, following its NDJSON progress stream until it reports success
+    try:
+        logger.info("Pulling model %s", model_name)
+        async with app.state.http_client.stream(
+            "POST", "/api/pull", json={"name": model_name}, timeout=None
+        ) as resp:
+            logger.info("Pull model response status=%d", resp.status_code)
+            async for line in resp.aiter_lines():
+                if not line:
+                    continue
+                progress = orjson.loads(line)
+                if progress.get("error"):
+                    logger.error("Ollama failed to pull model %s: %s", model_name, progress['error'])
+                    break
+                if progress.get("status") == "success":
+                    _invalidate_tags_cache()
+                    logger.info("Model %s is now available locally.", model_name)
+                    break
+            else:
+                logger.warning("Pull stream for model %s ended without a success status.", model_name)
+    except Exception as e:
+        logger.error("Exception during model pull: %s", e)
 
     # Clean up NAT Gateway if created
     if os.getenv("OLLAMA_HOST",""):  # Only clean up if we hosted Ollama on the host
         if nat_gateway_id:
-            delete_nat_gateway(ec2_client, nat_gateway_id)
-            logger.info(f"NAT Gateway {nat_gateway_id} deleted after model pull.")
+            await _run(delete_nat_gateway, ec2_client, nat_gateway_id)
+            logger.info("NAT Gateway %s deleted after model pull.", nat_gateway_id)
             # Restore the original route
             if original_route:
-                restore_default_route(ec2_client, original_route)
-
-def run_async_task(model_name: str):
-    asyncio.run(pull_model_task(model_name))
+                await _run(restore_default_route, ec2_client, original_route)
 
 @app.post("/pull_model/{model_name}")
 async def pull_model(model_name: str, background_tasks: BackgroundTasks):
     """Trigger a model pull from Ollama in the background, managing NAT Gateway as needed."""
     logger.info(f"Received request to pull model: {model_name}")
-    background_tasks.add_task(run_async_task, model_name)
+    background_tasks.add_task(pull_model_task, model_name)
     return {"status": "pull_started", "model": model_name}
 
+# Short-lived cache of Ollama's /api/tags so UI polling collapses into one backend call per window
+TAGS_CACHE_TTL = 5
+TAGS_FETCH_TIMEOUT = 5.0
+_tags_cache = (float("-inf"), [])  # -inf marks empty; monotonic time can be < TTL right after boot
+_tags_generation = 0  # Bumped on invalidation so an in-flight fetch can't cache a stale list
+_tags_inflight = None  # Fetch shared by every caller that misses the cache, success or failure
+
+def _invalidate_tags_cache():
+    global _tags_cache, _tags_generation, _tags_inflight
+    _tags_cache = (float("-inf"), [])
+    _tags_generation += 1
+    _tags_inflight = None  # Later callers start a fresh fetch instead of joining the stale one
+
+async def _fetch_tags(generation: int):
+    """Fetch /api/tags once and cache the result unless the cache was invalidated meanwhile."""
+    global _tags_cache, _tags_inflight
+    try:
+        resp = await app.state.http_client.get("/api/tags", timeout=TAGS_FETCH_TIMEOUT)
+        logger.info("Ollama tags response status=%d len=%d", resp.status_code, len(resp.content))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Ollama tags response body=%s", resp.text)
+        if resp.status_code != 200:
+            logger.error("Failed to fetch Ollama tags: %s", resp.text)
+            raise HTTPException(status_code=resp.status_code, detail=resp.text)
+
+        data = orjson.loads(resp.content).get("models", [])
+        if generation == _tags_generation:
+            _tags_cache = (time.monotonic(), data)
+        return data
+    finally:
+        if _tags_inflight is asyncio.current_task():
+            _tags_inflight = None
+
+async def _get_tags():
+    """Return Ollama's local models, fetching /api/tags at most once per TTL window."""
+    global _tags_inflight
+    ts, data = _tags_cache
+    if time.monotonic() - ts < TAGS_CACHE_TTL:
+        return data
+
+    if _tags_inflight is None:
+        _tags_inflight = asyncio.create_task(_fetch_tags(_tags_generation))
+    # Shield so one caller disconnecting doesn't cancel the fetch the others are waiting on
+    return await asyncio.shield(_tags_inflight)
+
 @app.get("/check_model/{model_name}")
 async def check_model(model_name: str):
     """Check if a model is available locally"""
-    logger.info(f"Checking availability for model: {model_name}")
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(f"{OLLAMA_HOST}/api/tags")
-        logger.info(f"Check model response status: {resp.status_code}, body: {resp.text}")
-        if resp.status_code != 200:
-            logger.error(f"Failed to check model {model_name}: {resp.text}")
-            raise HTTPException(status_code=resp.status_code, detail=resp.text)
-        
-        models = resp.json().get("models", [])
-        for m in models:
-            if m.get("name") == model_name:
-                logger.info(f"Model {model_name} is available locally.")
-                return {"available": True, "model": m}
-        
-        logger.info(f"Model {model_name} is NOT available locally.")
-        return {"available": False}
+    logger.info("Checking availability for model: %s", model_name)
+    models = await _get_tags()
+    for m in models:
+        if m.get("name") == model_name:
+            logger.info("Model %s is available locally.", model_name)
+            return {"available": True, "model": m}
+
+    logger.info("Model %s is NOT available locally.", model_name)
+    return {"available": False}
 
 @app.delete("/delete_model/{model_name}")
 async def delete_model(model_name: str):
     """Delete a local Ollama model"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.request(
-            "DELETE",
-            f"{OLLAMA_HOST}/api/delete",
-            content=json.dumps({"name": model_name}),
-            headers={"Content-Type": "application/json"}
-        )
-        if resp.status_code != 200:
-            raise HTTPException(status_code=resp.status_code, detail=resp.text)
-        return {"status": "deleted", "model": model_name}
+    resp = await app.state.http_client.request(
+        "DELETE",
+        "/api/delete",
+        content=orjson.dumps({"name": model_name}),
+        headers={"Content-Type": "application/json"}
+    )
+    if resp.status_code != 200:
+        raise HTTPException(status_code=resp.status_code, detail=resp.text)
+    _invalidate_tags_cache()
+    return {"status": "deleted", "model": model_name}
+
+# Escape table for SSE data lines, applied once per chunk in a single pass
+_SSE_ESC = str.maketrans({'\n': '\\n', '\r': '\\r'})
 
 @app.post("/generate")
 async def generate_stream(request_data: dict):
@@ -274,7 +443,7 @@ async def generate_stream(request_data: dict):
     
     async def event_stream():
         try:
-            logger.info(f"Received data for streaming generation: {request_data}")
+            logger.info("Received data for streaming generation: %s", request_data)
 
             # Accept messages array from client
             messages = request_data.get("messages")
@@ -296,7 +465,7 @@ async def generate_stream(request_data: dict):
             elif model_name.startswith("ollama/"):
                 parameters["api_base"] = OLLAMA_HOST
 
-            logger.info(f"Requesting completion for model: {model_name} with parameters: {parameters}")
+            logger.info("Requesting completion for model: %s with parameters: %s", model_name, parameters)
             response = await acompletion(**parameters)
 
             async for chunk in response:
@@ -304,18 +473,16 @@ async def generate_stream(request_data: dict):
                 if not content:
                     content = chunk.get("completion")
                 if content:
-                    logger.debug(f"Sending chunk via SSE: {content}")
+                    logger.debug("Sending chunk via SSE: %s", content)
                     # Escape newlines and special characters for SSE format
-                    escaped_content = content.replace('\n', '\\n').replace('\r', '\\r')
+                    escaped_content = content.translate(_SSE_ESC)
                     yield f"data: {escaped_content}\n\n"
 
             logger.info("Sending [DONE] event to SSE client")
             yield f"data: [DONE]\n\n"
 
         except Exception as e:
-            import traceback
-            logger.exception(f"Exception in generate_stream: {str(e)}")
-            print("Exception:", traceback.format_exc())
+            logger.exception("Exception in generate_stream: %s", e)
             yield f"data: Error: {str(e)}\n\n"
 
     return StreamingResponse(
@@ -329,9 +496,14 @@ async def generate_stream(request_data: dict):
         }
     )
 
+# --- AWS ECS Helpers ---
+CLUSTER_NAME = os.environ.get("CLUSTER_NAME")
+SERVICE_NAME = os.environ.get("SERVICE_NAME")
+AUTOSCALING_GROUP_NAME = os.environ.get("AUTOSCALING_GROUP_NAME")
+
 def list_ecs_tasks(cluster_name: str, service_name: str):
     """List all tasks in the specified ECS service."""
-    ecs = boto3.client("ecs")
+    ecs = aws_client("ecs")
     try:
         response = ecs.list_tasks(
             cluster=cluster_name,
@@ -342,47 +514,70 @@ def list_ecs_tasks(cluster_name: str, service_name: str):
         logger.error(f"Failed to list ECS tasks: {e}")
         return []
 
-def stop_ecs_tasks(cluster_name: str, service_name: str):
-    """List tasks in the ECS service and stop them."""
-    tasks = list_ecs_tasks(cluster_name, service_name)
+async def stop_ecs_tasks_async(cluster_name: str, service_name: str):
+    """List tasks in the ECS service and stop them concurrently. Returns the ARNs that were stopped."""
+    tasks = await _run(list_ecs_tasks, cluster_name, service_name)
     if not tasks:
         logger.info(f"No tasks found in service {service_name}.")
-        return
+        return []
 
-    ecs = boto3.client("ecs")
-    for task in tasks:
-        try:
-            ecs.stop_task(
-                cluster=cluster_name,
-                task=task
-            )
+    ecs = aws_client("ecs")
+    results = await asyncio.gather(
+        *[_run(ecs.stop_task, cluster=cluster_name, task=task) for task in tasks],
+        return_exceptions=True
+    )
+    stopped = []
+    for task, result in zip(tasks, results):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to stop task {task}: {result}")
+        else:
             logger.info(f"Stopped task {task} in service {service_name}.")
-        except Exception as e:
-            logger.error(f"Failed to stop task {task}: {e}")
+            stopped.append(task)
+    return stopped
+
+def wait_tasks_stopped(cluster_name: str, task_arns: list):
+    """Block until the given ECS tasks have stopped (the waiter accepts up to 100 ARNs per call)."""
+    ecs = aws_client("ecs")
+    for i in range(0, len(task_arns), 100):
+        ecs.get_waiter('tasks_stopped').wait(
+            cluster=cluster_name,
+            tasks=task_arns[i:i + 100],
+            WaiterConfig={'Delay': 6, 'MaxAttempts': 40}
+        )
+
+def wait_services_stable(cluster_name: str, service_name: str):
+    """Block until the ECS service has reached its desired count."""
+    aws_client("ecs").get_waiter('services_stable').wait(
+        cluster=cluster_name,
+        services=[service_name],
+        WaiterConfig={'Delay': 15, 'MaxAttempts': 40}
+    )
 
 @app.get("/shutdown_selfhost_llm")
-def shutdown_ecs_service():
+async def shutdown_ecs_service():
     """
     Set ECS service desired count and ASG desired capacity to 0.
     Also stop all ECS tasks associated with the service.
     """
-    cluster_name = os.environ.get("CLUSTER_NAME")
-    service_name = os.environ.get("SERVICE_NAME")
-    autoscaling_group_name = os.environ.get("AUTOSCALING_GROUP_NAME")
+    cluster_name = CLUSTER_NAME
+    service_name = SERVICE_NAME
+    autoscaling_group_name = AUTOSCALING_GROUP_NAME
     if not all([cluster_name, service_name, autoscaling_group_name]):
         raise HTTPException(status_code=400, detail="Missing environment variables for cluster/service/asg name.")
 
-    ecs = boto3.client("ecs")
-    asg = boto3.client("autoscaling")
+    ecs = aws_client("ecs")
+    asg = aws_client("autoscaling")
     try:
-        asg.update_auto_scaling_group(
+        await _run(
+            asg.update_auto_scaling_group,
             AutoScalingGroupName=autoscaling_group_name,
             DesiredCapacity=0,
             MinSize=0
         )
         logger.info(f"Set ASG {autoscaling_group_name} desired capacity to 0.")
         
-        ecs.update_service(
+        await _run(
+            ecs.update_service,
             cluster=cluster_name,
             service=service_name,
             desiredCount=0,
@@ -391,7 +586,17 @@ def shutdown_ecs_service():
         logger.info(f"Set ECS service {service_name} desired count to 0.")
 
         # Stop all ECS tasks in the service
-        stop_ecs_tasks(cluster_name, service_name)
+        stopped_tasks = await stop_ecs_tasks_async(cluster_name, service_name)
+
+        # Wait for the tasks to settle so callers don't need to poll /selfhost_status
+        if stopped_tasks:
+            try:
+                await _run(wait_tasks_stopped, cluster_name, stopped_tasks)
+                logger.info(f"All stopped tasks in service {service_name} have reached STOPPED.")
+            except WaiterError as e:
+                logger.warning(f"Tasks in service {service_name} did not stop in time: {e}")
+            with _status_cache_lock:
+                _status_cache.clear()
 
         return {"status": "success"}
     except Exception as e:
@@ -400,27 +605,29 @@ def shutdown_ecs_service():
 
 
 @app.get("/start_selfhost_llm")
-def start_ecs_service():
+async def start_ecs_service():
     """
     Set ECS service desired count and ASG desired capacity to 1.
     """
-    cluster_name = os.environ.get("CLUSTER_NAME")
-    service_name = os.environ.get("SERVICE_NAME")
-    autoscaling_group_name = os.environ.get("AUTOSCALING_GROUP_NAME")
+    cluster_name = CLUSTER_NAME
+    service_name = SERVICE_NAME
+    autoscaling_group_name = AUTOSCALING_GROUP_NAME
     if not all([cluster_name, service_name, autoscaling_group_name]):
         raise HTTPException(status_code=400, detail="Missing environment variables for cluster/service/asg name.")
 
-    ecs = boto3.client("ecs")
-    asg = boto3.client("autoscaling")
+    ecs = aws_client("ecs")
+    asg = aws_client("autoscaling")
     try:
-        asg.update_auto_scaling_group(
+        await _run(
+            asg.update_auto_scaling_group,
             AutoScalingGroupName=autoscaling_group_name,
             DesiredCapacity=1,
             MinSize=0
         )
         logger.info(f"Set ASG {autoscaling_group_name} desired capacity to 1.")
         
-        ecs.update_service(
+        await _run(
+            ecs.update_service,
             cluster=cluster_name,
             service=service_name,
             desiredCount=1,
@@ -428,46 +635,70 @@ def start_ecs_service():
         )
         logger.info(f"Set ECS service {service_name} desired count to 1.")
 
+        # Drop any cached pre-start status so the UI's next poll sees the new tasks
+        with _status_cache_lock:
+            _status_cache.clear()
 
         return {"status": "success"}
     except Exception as e:
         logger.error(f"Error starting ECS/ASG: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-def get_ecs_task_status(cluster_name: str, task_arn: str):
-    """Get the status of a specific ECS task."""
-    ecs = boto3.client("ecs")
+def describe_all_tasks(cluster_name: str, task_arns: list):
+    """Describe ECS tasks in batches of up to 100 ARNs (the describe_tasks limit)."""
+    ecs = aws_client("ecs")
+    described = []
     try:
-        response = ecs.describe_tasks(
-            cluster=cluster_name,
-            tasks=[task_arn]
-        )
-        return response['tasks'][0]['lastStatus']
+        for i in range(0, len(task_arns), 100):
+            response = ecs.describe_tasks(
+                cluster=cluster_name,
+                tasks=task_arns[i:i + 100]
+            )
+            described.extend(response['tasks'])
+        return described
     except Exception as e:
-        logger.error(f"Failed to get ECS task status: {e}")
-        return None
+        logger.error(f"Failed to describe ECS tasks: {e}")
+        return []
+
+# The UI polls /selfhost_status while the service starts, so dedupe those ECS calls briefly.
+_status_cache = TTLCache(maxsize=8, ttl=5)
+_status_cache_lock = threading.Lock()
 
 @app.get("/selfhost_status")
-def selfhost_status():
+async def selfhost_status():
     """
     Check if the self-hosted LLM ECS service is ready.
     Returns the status of the latest ECS task in the service.
     """
-    cluster_name = os.environ.get("CLUSTER_NAME")
-    service_name = os.environ.get("SERVICE_NAME")
+    cluster_name = CLUSTER_NAME
+    service_name = SERVICE_NAME
     if not all([cluster_name, service_name]):
         raise HTTPException(status_code=400, detail="Missing environment variables for cluster/service name.")
 
+    cache_key = (cluster_name, service_name)
+    with _status_cache_lock:
+        if cache_key in _status_cache:
+            return _status_cache[cache_key]
+
     # Get all tasks for the service
-    tasks = list_ecs_tasks(cluster_name, service_name)
+    tasks = await _run(list_ecs_tasks, cluster_name, service_name)
     if not tasks:
-        return {"ready": False, "status": "NO_TASKS"}
+        result = {"ready": False, "status": "NO_TASKS"}
+    else:
+        # Describe every task in one call and report the most recently started one
+        described = await _run(describe_all_tasks, cluster_name, tasks)
+        if described:
+            latest_task = max(described, key=lambda t: t.get("startedAt") or t.get("createdAt"))
+            latest_task_arn = latest_task["taskArn"]
+            status = latest_task.get("lastStatus")
+        else:
+            latest_task_arn = tasks[-1]
+            status = None
+        result = {"ready": status == "RUNNING", "status": status, "task_arn": latest_task_arn}
 
-    # Get the status of the most recent task (last in list)
-    latest_task_arn = tasks[-1]
-    status = get_ecs_task_status(cluster_name, latest_task_arn)
-    ready = status == "RUNNING"
-    return {"ready": ready, "status": status, "task_arn": latest_task_arn}
+    with _status_cache_lock:
+        _status_cache[cache_key] = result
+    return result
 
 # @app.get("/list_models")
 # async def list_models():
@@ -484,28 +715,38 @@ def selfhost_status():
 #     all_models = ollma_models + enterprise_models
 #     return {"models": all_models}
 
+async def _fetch_ollama_models():
+    """Fetch locally available models from Ollama, formatted for the UI."""
+    ollama_models_response = await _get_tags()
+    return [
+        {"value": f"ollama/{m['name']}", "label": f"ollama ({m['name']})"}
+        for m in ollama_models_response
+    ]
+
+# Enterprise models are static, so flatten them once at import; a tuple keeps the shared copy immutable
+ENTERPRISE_MODELS_FLAT = tuple(itertools.chain.from_iterable(models.values()))
+
+async def _fetch_enterprise_models():
+    """Return the configured enterprise models."""
+    return ENTERPRISE_MODELS_FLAT
+
 @app.get("/list_models")
 async def list_models():
     """List all available models from Ollama and enterprise models."""
     logger.info("Listing all available models from Ollama and enterprise models.")
-    
-    # Always include enterprise models
-    enterprise_models = sum(models.values(), [])
-    ollama_models = []
-
-    try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(f"{OLLAMA_HOST}/api/tags", timeout=5.0)
-            resp.raise_for_status()  # raises for 4xx/5xx
-
-            ollama_models_response = resp.json().get("models", [])
-            ollama_models = [
-                {"value": f"ollama/{m['name']}", "label": f"ollama ({m['name']})"}
-                for m in ollama_models_response
-            ]
-    except Exception as e:
-        # Log error but don’t break
-        logger.warning(f"Failed to fetch Ollama models: {e}")
 
-    all_models = ollama_models + enterprise_models
+    # Fetch every source concurrently; a failing source is logged and skipped, not raised
+    ollama_models, enterprise_models = await asyncio.gather(
+        _fetch_ollama_models(),
+        _fetch_enterprise_models(),
+        return_exceptions=True
+    )
+    if isinstance(ollama_models, Exception):
+        logger.warning(f"Failed to fetch Ollama models: {ollama_models}")
+        ollama_models = []
+    if isinstance(enterprise_models, Exception):
+        logger.warning(f"Failed to load enterprise models: {enterprise_models}")
+        enterprise_models = ()
+
+    all_models = [*ollama_models, *enterprise_models]
     return {"models": all_models}